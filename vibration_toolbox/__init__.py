@@ -38,12 +38,3 @@ https://docs.python.org/3.5/tutorial/modules.html#importing-from-a-package
 if 'pytest' in sys.argv[0]:
     # print('Setting backend to agg to run tests')
     mpl.use('agg')
-
-
-# print options were change inside modules to produce better
-# outputs at examples. Here we set the print options to the
-# default values after importing the modules to avoid changing
-# np default print options when importing the toolbox.
-np.set_printoptions(edgeitems=3, infstr='inf', linewidth=75,
-                    nanstr='nan', precision=8, suppress=False,
-                    threshold=1000, formatter=None)
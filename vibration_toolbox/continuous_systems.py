@@ -1,9 +1,12 @@
-import matplotlib.pyplot as plt
+from functools import lru_cache
+
 import numpy as np
-import scipy as sp
 import matplotlib as mpl
-from scipy.interpolate import UnivariateSpline
-from scipy.optimize import newton_krylov
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
 try:
     from IPython.display import clear_output, display, HTML
@@ -24,8 +27,128 @@ def _in_ipynb():
         return False
 
 
-mpl.rcParams['lines.linewidth'] = 2
-mpl.rcParams['figure.figsize'] = (10, 6)
+# Plot settings, applied only while the functions of this module plot.
+_plot_rc = {'lines.linewidth': 2, 'figure.figsize': (10, 6)}
+
+
+@lru_cache(maxsize=None)
+def _bnl(bctype, n_max):
+    """Roots of the Euler-Bernoulli beam frequency equation.
+
+    Returns the Bnl values of modes 1 to `n_max` for the boundary condition
+    `bctype` (see `euler_beam_modes`). Results are cached, so the returned
+    array is read only.
+    """
+    n = np.arange(n_max) + 1
+    # Roots of the lowest modes are tabulated, higher ones use the
+    # asymptotic value.
+    Bnl = np.empty(n_max)
+    Bnllow = np.array(())
+    nlow = 0
+
+    if bctype == 1:
+        Bnllow = np.array((0, 0, 4.73004074486, 7.8532046241,
+                           10.995607838, 14.1371654913, 17.2787596574))
+        nlow = 7
+        Bnl = (2 * n - 3) * np.pi / 2
+    elif bctype == 2:
+        Bnllow = np.array((1.88, 4.69, 7.85, 10.99, 14.14))
+        nlow = 4
+        Bnl = (2 * n - 1) * np.pi / 2
+    elif bctype == 3:
+        Bnllow = np.array((3.93, 7.07, 10.21, 13.35, 16.49))
+        nlow = 4
+        Bnl = (4 * n + 1) * np.pi / 4
+    elif bctype == 4:
+        Bnllow = np.array((2.37, 5.5, 8.64, 11.78, 14.92))
+        nlow = 4
+        Bnl = (4 * n - 1) * np.pi / 4
+    elif bctype == 5:
+        Bnllow = np.array((4.73, 7.85, 11, 14.14, 17.28))
+        nlow = 4
+        Bnl = (2 * n + 1) * np.pi / 2
+    elif bctype == 6:
+        Bnl = n * np.pi
+
+    nlow = min(nlow, n_max)
+    Bnl[:nlow] = Bnllow[:nlow]
+
+    Bnl.flags.writeable = False
+    return Bnl
+
+
+def _beam_sig(n, Bnl, bctype):
+    """Mode shape coefficients of the Euler-Bernoulli beam.
+
+    Returns the coefficient sigma multiplying the sinh/sin terms of the
+    mode shapes of modes `n` with roots `Bnl` (see `_beam_mode_shapes`).
+    """
+    sig = np.zeros(len(Bnl))
+    if bctype == 1:
+        # The first two modes are the rigid body translation and rotation.
+        elastic = n > 2
+        Bnle = Bnl[elastic]
+        sig[elastic] = ((np.cosh(Bnle) - np.cos(Bnle)) /
+                        (np.sinh(Bnle) - np.sin(Bnle)))
+    elif bctype == 2:
+        sig = (np.sinh(Bnl) - np.sin(Bnl)) / (np.cosh(Bnl) - np.cos(Bnl))
+    elif bctype == 3 or bctype == 5:
+        sig = (np.cosh(Bnl) - np.cos(Bnl)) / (np.sinh(Bnl) - np.sin(Bnl))
+    elif bctype == 4:
+        sig = (np.sinh(Bnl) + np.sin(Bnl)) / (np.cosh(Bnl) - np.cos(Bnl))
+
+    return sig
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _beam_mode_kernel(x_normed, Bnl, sig, sign, out):
+        """Fill `out` with cosh(b) + sign*cos(b) - sig*(sinh(b) + sign*sin(b)).
+
+        Fuses the four transcendental evaluations of each point in a single
+        pass over the mode shape array.
+        """
+        for j in prange(out.shape[0]):
+            Bj = Bnl[j]
+            sj = sig[j]
+            for k in range(out.shape[1]):
+                b = Bj * x_normed[k]
+                e = np.exp(b)
+                einv = 1.0 / e
+                out[j, k] = (0.5 * (e + einv) + sign * np.cos(b) -
+                             sj * (0.5 * (e - einv) + sign * np.sin(b)))
+
+
+def _beam_mode_shapes(x_normed, n, Bnl, sig, bctype):
+    """Mode shapes of the Euler-Bernoulli beam before mass normalization.
+
+    Evaluates the closed form mode shapes of modes `n` at the normalized
+    coordinates `x_normed`. Returns an array with one row per mode, so that
+    each mode shape is contiguous in memory. A compiled kernel is used when
+    numba is installed.
+    """
+    if bctype == 6:
+        return np.sin(np.multiply.outer(Bnl, x_normed))
+
+    # free-free modes add the cos/sin terms, the other conditions subtract
+    sign = 1.0 if bctype == 1 else -1.0
+    if njit is not None:
+        U = np.empty((len(Bnl), len(x_normed)))
+        _beam_mode_kernel(np.asarray(x_normed, dtype=float),
+                          np.asarray(Bnl, dtype=float),
+                          np.asarray(sig, dtype=float), sign, U)
+    else:
+        b = np.multiply.outer(Bnl, x_normed)
+        # cosh and sinh from a single exponential
+        e = np.exp(b)
+        einv = 1.0 / e
+        U = (0.5 * (e + einv) + sign * np.cos(b) -
+             sig[:, None] * (0.5 * (e - einv) + sign * np.sin(b)))
+    if bctype == 1:
+        U[n == 1] = 1
+        U[n == 2] = x_normed - 0.5
+
+    return U
 
 
 def euler_beam_modes(n=10, bctype=3, npoints=2001,
@@ -77,125 +200,43 @@ def euler_beam_modes(n=10, bctype=3, npoints=2001,
     Text(0.5, 1.0, 'Mode 1')
     >>> plt.grid(True)
     """
+    if not isinstance(n, int):
+        n = tuple(n)
+    omega_n, x, U = _euler_beam_modes(n, bctype, npoints, tuple(beamparams))
+    # The cached arrays are shared between calls.
+    return omega_n.copy(), x.copy(), U.copy()
+
 
+@lru_cache(maxsize=32)
+def _euler_beam_modes(n, bctype, npoints, beamparams):
+    """Cached implementation of `euler_beam_modes`."""
     E = beamparams[0]
     I = beamparams[1]
     rho = beamparams[2]
     A = beamparams[3]
     L = beamparams[4]
+    omega_scale = np.sqrt(E * I / (rho * A * L ** 4))
     if isinstance(n, int):
-        ln = n
         n = np.arange(n) + 1
     else:
-        ln = len(n)
+        n = np.asarray(n)
 
     # len=[0:(1/(npoints-1)):1]';  %Normalized length of the beam
     x_normed = np.linspace(0, 1, npoints, endpoint=True)
     x = x_normed * L
     # Determine natural frequencies and mode shapes depending on the
     # boundary condition.
-    # Mass simplification. The following was arange_(1,length_(n)).reshape(-1)
-    mode_num_range = np.arange(0, ln)
-    Bnl = np.empty(ln)
-    w = np.empty(ln)
-    U = np.empty([npoints, ln])
+    Bnl = _bnl(bctype, int(np.max(n)))[n - 1]
+    sig = _beam_sig(n, Bnl, bctype)
+    U = _beam_mode_shapes(x_normed, n, Bnl, sig, bctype)
 
-    if bctype == 1:
-        desc = 'Free-Free '
-        Bnllow = np.array((0, 0, 4.73004074486, 7.8532046241,
-                           10.995607838, 14.1371654913, 17.2787596574))
-        for i in mode_num_range:
-            if n[i] > 7:
-                Bnl[i] = (2 * n[i] - 3) * np.pi / 2
-            else:
-                Bnl[i] = Bnllow[i]
-        for i in mode_num_range:
-            if n[i] == 1:
-                w[i] = 0
-                U[:, i] = 1 + x_normed * 0
-            elif n[i] == 2:
-                w[i] = 0
-                U[:, i] = x_normed - 0.5
-            else:
-                sig = (np.cosh(Bnl[i]) - np.cos(Bnl[i])) / \
-                      (np.sinh(Bnl[i]) - np.sin(Bnl[i]))
-                w[i] = (Bnl[i] ** 2) * np.sqrt(E * I / (rho * A * L ** 4))
-                b = Bnl[i] * x_normed
-                U[:, i] = np.cosh(b) + np.cos(b) - sig * \
-                    (np.sinh(b) + np.sin(b))
-    elif bctype == 2:
-        desc = 'Clamped-Free '
-        Bnllow = np.array((1.88, 4.69, 7.85, 10.99, 14.14))
-        for i in mode_num_range:
-            if n[i] > 4:
-                Bnl[i] = (2 * n[i] - 1) * np.pi / 2
-            else:
-                Bnl[i] = Bnllow[i]
-
-        for i in mode_num_range:
-            sig = (np.sinh(Bnl[i]) - np.sin(Bnl[i])) / \
-                  (np.cosh(Bnl[i]) - np.cos(Bnl[i]))
-            w[i] = (Bnl[i] ** 2) * np.sqrt(E * I / (rho * A * L ** 4))
-            b = Bnl[i] * x_normed
-            # plt.plot(x,(sp.cosh(b) - sp.cos(b) -
-            # sig * (sp.sinh(b) - sp.sin(b))))
-            U[:, i] = np.cosh(b) - np.cos(b) - sig * (np.sinh(b) - np.sin(b))
-
-    elif bctype == 3:
-        desc = 'Clamped-Pinned '
-        Bnllow = np.array((3.93, 7.07, 10.21, 13.35, 16.49))
-        for i in mode_num_range:
-            if n[i] > 4:
-                Bnl[i] = (4 * n[i] + 1) * np.pi / 4
-            else:
-                Bnl[i] = Bnllow[i]
-        for i in mode_num_range:
-            sig = (np.cosh(Bnl[i]) - np.cos(Bnl[i])) / \
-                  (np.sinh(Bnl[i]) - np.sin(Bnl[i]))
-            w[i] = (Bnl[i] ** 2) * np.sqrt(E * I / (rho * A * L ** 4))
-            b = Bnl[i] * x_normed
-            U[:, i] = np.cosh(b) - np.cos(b) - sig * (np.sinh(b) - np.sin(b))
-    elif bctype == 4:
-        desc = 'Clamped-Sliding '
-        Bnllow = np.array((2.37, 5.5, 8.64, 11.78, 14.92))
-        for i in mode_num_range:
-            if n[i] > 4:
-                Bnl[i] = (4 * n[i] - 1) * np.pi / 4
-            else:
-                Bnl[i] = Bnllow[i]
-        for i in mode_num_range:
-            sig = (np.sinh(Bnl[i]) + np.sin(Bnl[i])) / \
-                  (np.cosh(Bnl[i]) - np.cos(Bnl[i]))
-            w[i] = (Bnl[i] ** 2) * np.sqrt(E * I / (rho * A * L ** 4))
-            b = Bnl[i] * x_normed
-            U[:, i] = np.cosh(b) - np.cos(b) - sig * (np.sinh(b) - np.sin(b))
-    elif bctype == 5:
-        desc = 'Clamped-Clamped '
-        Bnllow = np.array((4.73, 7.85, 11, 14.14, 17.28))
-        for i in mode_num_range:
-            if n[i] > 4:
-                Bnl[i] = (2 * n[i] + 1) * np.pi / 2
-            else:
-                Bnl[i] = Bnllow[i]
-        for i in mode_num_range:
-            sig = (np.cosh(Bnl[i]) - np.cos(Bnl[i])) / \
-                  (np.sinh(Bnl[i]) - np.sin(Bnl[i]))
-            w[i] = (Bnl[i] ** 2) * np.sqrt(E * I / (rho * A * L ** 4))
-            b = Bnl[i] * x_normed
-            U[:, i] = np.cosh(b) - np.cos(b) - sig * (np.sinh(b) - np.sin(b))
-    elif bctype == 6:
-        desc = 'Pinned-Pinned '
-        for i in mode_num_range:
-            Bnl[i] = n[i] * np.pi
-            w[i] = (Bnl[i] ** 2) * np.sqrt(E * I / (rho * A * L ** 4))
-            U[:, i] = np.sin(Bnl[i] * x_normed)
+    w = Bnl * Bnl * omega_scale
 
     # Mass Normalization of mode shapes
-    for i in mode_num_range:
-        U[:, i] = U[:, i] / np.sqrt(np.dot(U[:, i], U[:, i]) * rho * A * L)
+    U /= np.sqrt(np.einsum('ij,ij->i', U, U) * rho * A * L)[:, None]
 
     omega_n = w
-    return omega_n, x, U
+    return omega_n, x, U.T
 
 
 def euler_beam_frf(xin=0.22, xout=0.32, fmin=0.0, fmax=1000.0, zeta=0.02,
@@ -228,7 +269,7 @@ def euler_beam_frf(xin=0.22, xout=0.32, fmin=0.0, fmax=1000.0, zeta=0.02,
         Young's modulus, second moment of area, density, cross section area,
         length of beam
     npoints: int
-        number of points for returned mode shape array
+        number of frequency points in `fout` and rows in `H`
 
     Returns
     -------
@@ -250,59 +291,95 @@ def euler_beam_frf(xin=0.22, xout=0.32, fmin=0.0, fmax=1000.0, zeta=0.02,
     rho = beamparams[2]
     A = beamparams[3]
     L = beamparams[4]
-    npoints = 2001
-    i = 0
-    w = np.linspace(fmin, fmax, 2001) * 2 * sp.pi
+    omega_scale = np.sqrt(E * I / (rho * A * L ** 4))
+    w = np.linspace(fmin, fmax, npoints) * 2 * np.pi
     if min([xin, xout]) < 0 or max([xin, xout]) > L:
         print('One or both locations are not on the beam')
         return
-    wn = np.array((0, 0))
-    # The number 200 is arbitrarily large and unjustified.
-    a = sp.empty([npoints, 200], dtype=complex)
-    f = sp.empty(100)
-
-    while wn[-1] < 1.3 * (fmax * 2 * sp.pi):
-        i = i + 1
-        wn, xx, U = euler_beam_modes(n=i, bctype=bctype,
-                                     beamparams=beamparams, npoints=5000)
-        spl = UnivariateSpline(xx, U[:, i - 1])
-        Uin = spl(xin)
-        Uout = spl(xout)
-        a[:, i - 1] = rho * A * Uin * Uout / \
-            (wn[-1] ** 2 - w ** 2 + 2 * zeta * wn[-1] * w * sp.sqrt(-1))
-        f[i] = wn[-1] / 2 / sp.pi
-    a = a[:, 0:i]
-    plt.figure()
-    plt.subplot(211)
-    plt.plot(w / 2 / sp.pi, 20 * sp.log10(sp.absolute(sp.sum(a, axis=1))), '-')
-    # plt.hold(True)
-    plt.plot(w / 2 / sp.pi, 20 * sp.log10(sp.absolute(a)), '-')
-    plt.grid(True)
-    plt.xlabel('Frequency (Hz)')
-    plt.ylabel('FRF (dB)')
-    axlim = plt.axis()
-
-    plt.axis(axlim + np.array([0, 0, -0.1 * (axlim[3] - axlim[2]),
-                               0.1 * (axlim[3] - axlim[2])]))
-
-    plt.subplot(212)
-    plt.plot(w / 2 / sp.pi, sp.unwrap(sp.angle(sp.sum(a, axis=1))) /
-             sp.pi * 180, '-')
-    plt.plot(w / 2 / sp.pi, sp.unwrap(sp.angle(a)) / sp.pi * 180, '-')
-    plt.grid(True)
-    plt.xlabel('Frequency (Hz)')
-    plt.ylabel('Phase (deg)')
-    plt.tight_layout()
-    axlim = plt.axis()
-    plt.axis(axlim + np.array([0, 0, -0.1 * (axlim[3] - axlim[2]),
-                               0.1 * (axlim[3] - axlim[2])]))
-    plt.show()
-
-    fout = w / 2 / sp.pi
+
+    # Modes are included up to the first one above 1.3 times fmax. The
+    # number of modes to solve for is estimated from the asymptotic value
+    # Bnl ~ (n + c) * pi, with -3/2 <= c <= 1/2 for all boundary conditions.
+    wmax = 1.3 * (fmax * 2 * np.pi)
+    Bnl_max = np.sqrt(wmax / omega_scale)
+    nmax = int(Bnl_max / np.pi) + 3
+    n = np.arange(nmax) + 1
+    Bnl = _bnl(bctype, nmax)
+    wn = Bnl * Bnl * omega_scale
+    nused = np.argmax(wn >= wmax) + 1
+    n, Bnl, wn = n[:nused], Bnl[:nused], wn[:nused]
+    sig = _beam_sig(n, Bnl, bctype)
+
+    # Evaluate the closed form mode shapes at xin and xout, scaled as
+    # euler_beam_modes does on a 5000 point grid.
+    U = _beam_mode_shapes(np.linspace(0, 1, 5000), n, Bnl, sig, bctype)
+    norms = np.sqrt(np.einsum('ij,ij->i', U, U) * rho * A * L)
+    Uin, Uout = _beam_mode_shapes(np.array([xin, xout]) / L,
+                                  n, Bnl, sig, bctype).T / norms
+
+    # Modal receptances, formed in place: the denominator is written to the
+    # real and imaginary parts of `a` and then divided into the numerator.
+    w2 = (w * w)[:, None]
+    two_zeta_w = (2 * zeta * w)[:, None]
+    a = np.empty((len(w), nused), dtype=complex)
+    np.subtract(wn * wn, w2, out=a.real)
+    np.multiply(wn, two_zeta_w, out=a.imag)
+    np.divide(rho * A * Uin * Uout, a, out=a)
+
+    fout = w / 2 / np.pi
     H = a
+
+    # dB magnitudes of the total FRF and of each mode, computed in place
+    H_sum = np.sum(a, axis=1)
+    mag_sum = np.absolute(H_sum)
+    np.log10(mag_sum, out=mag_sum)
+    mag_sum *= 20
+    mag = np.absolute(a)
+    np.log10(mag, out=mag)
+    mag *= 20
+
+    import matplotlib.pyplot as plt
+    with mpl.rc_context(_plot_rc):
+        fig, (ax1, ax2) = plt.subplots(2, 1)
+        ax1.plot(fout, mag_sum, '-')
+        ax1.plot(fout, mag, '-')
+        ax1.grid(True)
+        ax1.set_xlabel('Frequency (Hz)')
+        ax1.set_ylabel('FRF (dB)')
+        ylim = _padded_limits(mag_sum, mag)
+        if ylim is not None:
+            ax1.set_ylim(ylim)
+
+        phase_sum = np.unwrap(np.angle(H_sum)) / np.pi * 180
+        phase = np.unwrap(np.angle(a)) / np.pi * 180
+        ax2.plot(fout, phase_sum, '-')
+        ax2.plot(fout, phase, '-')
+        ax2.grid(True)
+        ax2.set_xlabel('Frequency (Hz)')
+        ax2.set_ylabel('Phase (deg)')
+        ylim = _padded_limits(phase_sum, phase)
+        if ylim is not None:
+            ax2.set_ylim(ylim)
+        fig.tight_layout()
+        plt.show()
+
     return fout, H
 
 
+def _padded_limits(*ys):
+    """Limits around the finite values of all `ys`, with 10% padding.
+
+    Returns None when there are no finite values.
+    """
+    y = np.concatenate([np.ravel(yi) for yi in ys])
+    y = y[np.isfinite(y)]
+    if y.size == 0:
+        return None
+    ymin, ymax = y.min(), y.max()
+    pad = 0.1 * (ymax - ymin) if ymax > ymin else 1.0
+    return ymin - pad, ymax + pad
+
+
 def ebf(xin, xout, fmin, fmax, zeta):
     """Shortcut call to `euler_beam_frf`."""
     _, _ = euler_beam_frf(xin, xout, fmin, fmax, zeta)
@@ -315,6 +392,46 @@ def ebf1(xin, xout):
     return
 
 
+def _newton(func, fprime, x0, tol=1e-12, maxiter=50):
+    """Newton iteration applied to all elements of `x0` at once.
+
+    `func` and `fprime` must be elementwise functions of an array. Each
+    element is iterated from its own initial guess until all steps are
+    smaller than `tol` (relative to the root).
+    """
+    x = np.array(x0, dtype=float)
+    for _ in range(maxiter):
+        step = func(x) / fprime(x)
+        x -= step
+        if np.all(np.abs(step) <= tol * np.abs(x)):
+            break
+
+    return x
+
+
+def _trig_progression(func, start, step, ln):
+    """Evaluate `func` at `start + k * step` for k = 0, ..., ln - 1.
+
+    `func` is np.sin or np.cos, `start` and `step` are arrays of angles (or
+    scalars). Only the first two terms call `func`, the others follow from
+    the recurrence f(a + step) = 2 cos(step) f(a) - f(a - step).
+    Returns an array with one row per value of k.
+    """
+    start, step = np.broadcast_arrays(np.asarray(start, dtype=float),
+                                      np.asarray(step, dtype=float))
+    U = np.empty((ln,) + start.shape)
+    if ln > 0:
+        U[0] = func(start)
+    if ln > 1:
+        U[1] = func(start + step)
+    two_cos = 2 * np.cos(step)
+    for k in range(2, ln):
+        np.multiply(two_cos, U[k - 1], out=U[k])
+        U[k] -= U[k - 2]
+
+    return U
+
+
 def uniform_bar_modes(n=10, bctype=3, npoints=2001,
                       barparams=np.array([7.31e10, 2747.0, 0.4]),
                       kl_over_EA = 1000, m_over_rhoAL = 1000):
@@ -362,16 +479,28 @@ def uniform_bar_modes(n=10, bctype=3, npoints=2001,
     >>> import vibration_toolbox as vtb
     >>> omega_n, x, U = vtb.uniform_bar_modes(n=3)
     >>> plt.figure()
-    <matplotlib.figure...>
+    <Figure size 1000x600 with 0 Axes>
     >>> plt.plot(x,U)
     [<matplotlib.lines.Line2D object at ...>]
     >>> plt.xlabel('x (m)')
-    <matplotlib.text.Text object at ...>
+    Text(0.5, 0, 'x (m)')
     >>> plt.ylabel('Displacement (m)')
-    <matplotlib.text.Text object at ...>
+    Text(0, 0.5, 'Displacement (m)')
     >>> plt.title('Mode 3')
-    <matplotlib.text.Text object at ...>
+    Text(0.5, 1.0, 'Mode 3')
     """
+    if not isinstance(n, int):
+        n = tuple(n)
+    omega_n, x, U = _uniform_bar_modes(n, bctype, npoints, tuple(barparams),
+                                       kl_over_EA, m_over_rhoAL)
+    # The cached arrays are shared between calls.
+    return omega_n.copy(), x.copy(), U.copy()
+
+
+@lru_cache(maxsize=32)
+def _uniform_bar_modes(n, bctype, npoints, barparams, kl_over_EA,
+                       m_over_rhoAL):
+    """Cached implementation of `uniform_bar_modes`."""
     E = barparams[0]
     rho = barparams[1]
     L = barparams[2]
@@ -379,58 +508,66 @@ def uniform_bar_modes(n=10, bctype=3, npoints=2001,
         ln = n
         n = np.arange(n) + 1
     else:
+        n = np.asarray(n)
         ln = len(n)
 
     # len=[0:(1/(npoints-1)):1]';  %Normalized length of the bar
     x_normed = np.linspace(0, 1, npoints, endpoint = True)
     x = x_normed * L
     # Determine natural frequencies and mode shapes depending on the
-    # boundary condition.
-    # Mass simplification. The following was arange_(1,length_(n)).reshape(-1)
-    mode_num_range = np.arange(1, ln)
+    # boundary condition. n holds the (1 based) mode numbers.
+    nmax = int(np.max(n))
     w = np.empty(ln)
-    U = np.empty([npoints, ln])
+    U = np.empty([ln, npoints])
 
     if bctype == 1:
         desc = 'Free-Free '
-        for i in mode_num_range:
-            w[i] = i * np.pi * np.sqrt(E/rho) / L
-            U[:, i] = np.cos(i * np.pi * x_normed)
+        # The first mode is the rigid body mode.
+        w[:] = (n - 1) * np.pi * np.sqrt(E/rho) / L
+        U[:, :] = _trig_progression(np.cos, 0, np.pi * x_normed,
+                                    nmax)[n - 1]
     elif bctype == 2:
         desc = 'Fixed-Free '
-        for i in mode_num_range:
-            w[i] = (2*i-1) * np.pi * np.sqrt(E/rho) / (2 * L)
-            U[:, i] = np.sin((2*i-1) * np.pi * x_normed / 2)
+        w[:] = (2*n-1) * np.pi * np.sqrt(E/rho) / (2 * L)
+        U[:, :] = _trig_progression(np.sin, np.pi * x_normed / 2,
+                                    np.pi * x_normed, nmax)[n - 1]
     elif bctype == 3:
         desc = 'Fixed-Fixed '
-        for i in mode_num_range:
-            w[i] = i * np.pi * np.sqrt(E/rho) / L
-            U[:, i] = np.sin((i) * np.pi * x_normed)
+        w[:] = n * np.pi * np.sqrt(E/rho) / L
+        U[:, :] = _trig_progression(np.sin, np.pi * x_normed,
+                                    np.pi * x_normed, nmax)[n - 1]
     elif bctype == 4:
         desc = 'Fixed-Spring'
+        # lam + tan(lam) * kl_over_EA = 0 multiplied by cos(lam) to remove
+        # the poles of tan. The nth root lies between (n - 1/2)pi and n pi.
         def func(lam):
-            return lam + np.tan(lam)* kl_over_EA
-        for i in mode_num_range:
-            lam = newton_krylov(func, (0.25+i/2)*np.pi)
-            w[i] = lam * np.sqrt(E/rho) / L
-            U[:, i] = np.sin(lam * x_normed)
+            return lam * np.cos(lam) + kl_over_EA * np.sin(lam)
+
+        def fprime(lam):
+            return (1 + kl_over_EA) * np.cos(lam) - lam * np.sin(lam)
+        lam = _newton(func, fprime, (n - 0.25) * np.pi)
+        w[:] = lam * np.sqrt(E/rho) / L
+        U[:, :] = np.sin(np.multiply.outer(lam, x_normed))
     elif bctype == 5:
         desc = 'Fixed-Mass'
+        # tan(lam) = 1 / (lam * m_over_rhoAL) without the poles of tan. The
+        # nth root lies between (n - 1)pi and (n - 1/2)pi.
         def func(lam):
-            return np.tan(lam)-1/lam/m_over_rhoAL
-        for i in mode_num_range:
-            lam = newton_krylov(func, 0.25+i*np.pi)
-            w[i] = lam * np.sqrt(E/rho) / L
-            U[:, i] = np.sin(lam * x_normed)
-
+            return lam * m_over_rhoAL * np.sin(lam) - np.cos(lam)
 
+        def fprime(lam):
+            return ((1 + m_over_rhoAL) * np.sin(lam) +
+                    lam * m_over_rhoAL * np.cos(lam))
+        lam = _newton(func, fprime, (n - 0.75) * np.pi)
+        w[:] = lam * np.sqrt(E/rho) / L
+        U[:, :] = np.sin(np.multiply.outer(lam, x_normed))
 
     # Mass Normalization of mode shapes
-    for i in mode_num_range:
-        U[:, i] = U[:, i] / np.sqrt(np.dot(U[:, i], U[:, i]) * rho * L)
+    U /= np.sqrt(np.einsum('ij,ij->i', U, U) * rho * L)[:, None]
 
     omega_n = w
-    return omega_n, x, U
+    return omega_n, x, U.T
+
 
 """
 def ebf(xin, xout, fmin, fmax, zeta):
@@ -438,93 +575,6 @@ def ebf(xin, xout, fmin, fmax, zeta):
     return
 """
 
-def uniform_bar_modes(n=10, bctype=3, npoints=2001,
-                      barparams=np.array([7.31e10, 2747.0, 0.4])):
-    """Mode shapes and natural frequencies of Uniform bar/rod.
-
-    Parameters
-    ----------
-    n: int, numpy array
-        highest mode number or array of mode numbers to return
-    bctype: int
-        bctype = 1 free-free
-        bctype = 2 fixed-free
-        bctype = 3 fixed-fixed
-
-    barparams: numpy array
-        E, rho, L
-        Young's modulus, density, length of bar
-    npoints: int
-        number of points for returned mode shape array
-
-
-    Returns
-    -------
-    omega_n: numpy array
-        array of natural frequencies
-    x: numpy array
-        x coordinate
-    U: numpy array
-        mass normalized mode shape
-
-
-    Examples
-    --------
-    >>> import matplotlib.pyplot as plt
-    >>> import vibration_toolbox as vtb
-    >>> omega_n, x, U, *_ = vtb.uniform_bar_modes(n=1)
-    >>>
-    >>> plt.plot(x,U)
-    [<matplotlib.lines.Line2D object at ...>]
-    >>> plt.xlabel('x (m)')
-    Text(0.5, 0, 'x (m)')
-    >>> plt.ylabel('Displacement (m)')
-    Text(0, 0.5, 'Displacement (m)')
-    >>> plt.title('Mode 1')
-    Text(0.5, 1.0, 'Mode 1')
-    >>> plt.show()
-    """
-    E = barparams[0]
-    rho = barparams[1]
-    L = barparams[2]
-    if isinstance(n, int):
-        ln = n
-        n = np.arange(n) + 1
-    else:
-        ln = len(n)
-
-    # len=[0:(1/(npoints-1)):1]';  %Normalized length of the bar
-    lenth = np.linspace(0, L, npoints)
-    x = lenth * L
-    # Determine natural frequencies and mode shapes depending on the
-    # boundary condition.
-    # Mass simplification. The following was arange_(1,length_(n)).reshape(-1)
-    mode_num_range = np.arange(0, ln)
-    w = np.empty(ln)
-    U = np.empty([npoints, ln])
-
-    if bctype == 1:
-        desc = 'Free-Free '
-        for i in mode_num_range:
-            w[i] = i * np.pi * np.sqrt(E / rho) / L
-            U[:, i] = np.cos(i * np.pi * lenth / L)
-    elif bctype == 2:
-        desc = 'Fixed-Free '
-        for i in mode_num_range:
-            w[i] = (2 * i - 1) * np.pi * np.sqrt(E / rho) / (2 * L)
-            U[:, i] = np.sin((2 * i - 1) * np.pi * lenth / (2 * L))
-    elif bctype == 3:
-        desc = 'Fixed-Fixed '
-        for i in mode_num_range:
-            w[i] = i * np.pi * np.sqrt(E / rho) / L
-            U[:, i] = np.sin(i * np.pi * lenth / (2 * L))
-            # Mass Normalization of mode shapes
-            # for i in mode_num_range:
-            # U[:, i] = U[:, i] / np.sqrt(np.dot(U[:, i], U[:, i]) * rho * L)
-
-    omega_n = w
-    return omega_n, x, U
-
 def torsional_bar_modes(n=10, bctype=2, cstype=4, npoints=2001,
                      tbarparams=np.array([7.8e9, 8.4375e-09,
                                           2747.0, 0.4]), cspar=np.array([0.7,0.9,.1,.2])):
@@ -578,7 +628,17 @@ def torsional_bar_modes(n=10, bctype=2, cstype=4, npoints=2001,
     Text(0.5, 1.0, 'Mode 1')
     >>> plt.grid(True)
     """
+    if not isinstance(n, int):
+        n = tuple(n)
+    omega_n, x, U = _torsional_bar_modes(n, bctype, cstype, npoints,
+                                         tuple(tbarparams), tuple(cspar))
+    # The cached arrays are shared between calls.
+    return omega_n.copy(), x.copy(), U.copy()
+
 
+@lru_cache(maxsize=32)
+def _torsional_bar_modes(n, bctype, cstype, npoints, tbarparams, cspar):
+    """Cached implementation of `torsional_bar_modes`."""
     G = tbarparams[0]
     J = tbarparams[1]
     rho = tbarparams[2]
@@ -620,28 +680,28 @@ def torsional_bar_modes(n=10, bctype=2, cstype=4, npoints=2001,
     # Mass simplification. The following was arange_(1,length_(n)).reshape(-1)
     mode_num_range = np.arange(0, ln)
     w = np.empty(ln)
-    U = np.empty([npoints, ln])
+    U = np.empty([ln, npoints])
     c = np.sqrt(G*g/(rho*J))
 
     if bctype == 1:
         desc = 'Free-Free '
-        for i in mode_num_range:
-            w[i] = (i * np.pi * c) / L
-            U[:, i] = np.cos(i * np.pi * x / L)
+        i = mode_num_range
+        w[i] = (i * np.pi * c) / L
+        U[i, :] = _trig_progression(np.cos, 0, np.pi * x / L, ln)
     elif bctype == 2:
         desc = 'Fixed-Free '
-        for i in mode_num_range:
-            w[i] = (2 * i - 1) * np.pi * c / (2 * L)
-            U[:, i] = np.sin((2 * i - 1) * np.pi * x / (2 * L))
+        i = mode_num_range
+        w[i] = (2 * i - 1) * np.pi * c / (2 * L)
+        U[i, :] = _trig_progression(np.sin, -np.pi * x / (2 * L),
+                                    np.pi * x / L, ln)
     elif bctype == 3:
         desc = 'Fixed-Fixed '
-        for i in mode_num_range:
-            w[i] = (i * np.pi * c) / L
-            U[:, i] = np.sin(i * np.pi * x / L)
+        i = mode_num_range
+        w[i] = (i * np.pi * c) / L
+        U[i, :] = _trig_progression(np.sin, 0, np.pi * x / L, ln)
 
     # Mass Normalization of mode shapes
-    for i in mode_num_range:
-        U[:, i] = U[:, i] / np.sqrt(np.dot(U[:, i], U[:, i]) * rho * L)
+    U /= np.sqrt(np.einsum('ij,ij->i', U, U) * rho * L)[:, None]
 
     omega_n = w
-    return omega_n, x, U
+    return omega_n, x, U.T
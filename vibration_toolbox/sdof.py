@@ -1,12 +1,19 @@
 """Single degree of freedom responses and plots."""
 
+from functools import lru_cache
+
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy as sp
 from scipy import fft
 import matplotlib as mpl
 from scipy import integrate
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
 try:
     from IPython.display import clear_output, display, HTML
     from ipywidgets import interact, interact_manual, FloatSlider
@@ -47,18 +54,23 @@ def free_response(m=10, c=1, k=100, x0=1, v0=-1, max_time=10):
     ----------
     m, c, k :  floats, optional
         mass, damping coefficient, stiffness
-    x0, v0:  floats, optional
-        initial displacement, initial velocity
+    x0, v0:  floats or arrays, optional
+        initial displacement, initial velocity. Arrays of initial conditions
+        are solved at once, one column of x and v for each.
     max_time: float, optional
         end time for :math:`x(t)`
 
     Returns
     -------
     t, x, v : ndarrays
-        time, displacement, and velocity
-    zeta, omega, omega_d, A : floats
-        damping ratio, undamped natural frequency, damped natural frequency,
-        Amplitude
+        time, displacement, and velocity. x and v have one column per
+        initial condition.
+    zeta, omega, omega_d : floats
+        damping ratio, undamped natural frequency, damped natural frequency
+        (0 when abs(zeta) >= 1)
+    A : float or array
+        Amplitude, for each initial condition. When abs(zeta) >= 1 it is the
+        largest displacement.
 
     Examples
     --------
@@ -79,21 +91,66 @@ def free_response(m=10, c=1, k=100, x0=1, v0=-1, max_time=10):
     """
     omega = np.sqrt(k / m)
     zeta = c / 2 / omega / m
-    omega_d = omega * np.sqrt(1 - zeta ** 2)
-    A = np.sqrt(x0 ** 2 + (v0 + omega * zeta * x0) ** 2 / omega_d ** 2)
+    x0 = np.asarray(x0, dtype=float)
+    v0 = np.asarray(v0, dtype=float)
+    shape = np.broadcast(x0, v0).shape
 
-    def sdofs_deriv(x_xd, t0, m=m, c=c, k=k):
-        x, xd = x_xd
-        return [xd, -c / m * xd - k / m * x]
-
-    z0 = np.array([[x0, v0]])
-    # Solve for the trajectories
+    # Closed form solution, evaluated at all times (rows) and initial
+    # conditions (columns) at once
     t = np.linspace(0, max_time, int(250 * max_time))
-    z_t = np.asarray([integrate.odeint(sdofs_deriv, z0i, t)
-                      for z0i in z0])
-
-    x, y = z_t[:, :].T
-    return t, x, y, zeta, omega, omega_d, A
+    x0, v0 = np.broadcast_arrays(np.atleast_1d(x0), np.atleast_1d(v0))
+    tc = t[:, None]
+    # Negative damping ratios use the same expressions with a growing
+    # envelope, so the cases are told apart by zeta**2.
+    if zeta ** 2 < 1:
+        # underdamped
+        omega_d = omega * np.sqrt(1 - zeta ** 2)
+        A = np.sqrt(x0 ** 2 + (v0 + omega * zeta * x0) ** 2 / omega_d ** 2)
+        env = np.exp(-zeta * omega * tc)
+        cos_t = np.cos(omega_d * tc)
+        sin_t = np.sin(omega_d * tc)
+        b = (v0 + zeta * omega * x0) / omega_d
+        x = env * (x0 * cos_t + b * sin_t)
+        v = env * ((b * omega_d - zeta * omega * x0) * cos_t -
+                   (x0 * omega_d + zeta * omega * b) * sin_t)
+    elif zeta ** 2 == 1:
+        # critically damped
+        env = np.exp(-zeta * omega * tc)
+        b = v0 + zeta * omega * x0
+        x = env * (x0 + b * tc)
+        v = env * (v0 - zeta * omega * b * tc)
+    else:
+        # overdamped, x = c1 exp(s1 t) + c2 exp(s2 t)
+        s1 = -zeta * omega + omega * np.sqrt(zeta ** 2 - 1)
+        s2 = -zeta * omega - omega * np.sqrt(zeta ** 2 - 1)
+        c1 = (v0 - s2 * x0) / (s1 - s2)
+        c2 = x0 - c1
+        e1 = c1 * np.exp(s1 * tc)
+        e2 = c2 * np.exp(s2 * tc)
+        x = e1 + e2
+        v = s1 * e1 + s2 * e2
+
+    if zeta ** 2 >= 1:
+        # no oscillation, A is the largest displacement
+        omega_d = 0.0
+        A = np.absolute(x).max(axis=0)
+    A = A.reshape(shape)[()]
+
+    return t, x, v, zeta, omega, omega_d, A
+
+
+@lru_cache(maxsize=256)
+def _free_response_cached(m, c, k, x0, v0, max_time):
+    """Cached `free_response` for the plotting functions.
+
+    Interactive widgets call the plots again with the same values when a
+    slider returns to a previous position. The returned arrays are shared
+    between calls, so they are read only.
+    """
+    result = free_response(m, c, k, x0, v0, max_time)
+    for array in result[:3]:
+        array.flags.writeable = False
+    return result
 
 
 def phase_plot(m=10, c=1, k=100, x0=1, v0=-1, max_time=10):
@@ -117,8 +174,8 @@ def phase_plot(m=10, c=1, k=100, x0=1, v0=-1, max_time=10):
     >>> vtb.phase_plot()
 
     """
-    t, x, v, zeta, omega, omega_d, A = free_response(
-        m, c, k, x0, v0, max_time)
+    t, x, v, zeta, omega, omega_d, A = _free_response_cached(
+        float(m), float(c), float(k), float(x0), float(v0), float(max_time))
     fig = plt.figure()
     fig.suptitle('Velocity vs Displacement')
     ax = fig.add_subplot(111)
@@ -157,8 +214,8 @@ def phase_plot_i(max_time=(1.0, 200.0), v0=(-100, 100, 1.0),
 
 
 def time_plot(m=10, c=1, k=100, x0=1, v0=-1, max_time=100):
-    t, x, v, zeta, omega, omega_d, A = free_response(
-        m, c, k, x0, v0, max_time)
+    t, x, v, zeta, omega, omega_d, A = _free_response_cached(
+        float(m), float(c), float(k), float(x0), float(v0), float(max_time))
     fig = plt.figure()
     fig.suptitle('Displacement vs Time')
     ax = fig.add_subplot(111)
@@ -166,12 +223,21 @@ def time_plot(m=10, c=1, k=100, x0=1, v0=-1, max_time=100):
     ax.set_ylabel('Displacement')
     ax.grid(True)
     ax.plot(t, x)
+    # Axis limits from the known bounds of the response instead of reading
+    # them back from the axes. A only bounds a decaying oscillation.
+    if 0 <= zeta < 1:
+        ylim = _padded_limits(np.array([-A, A]))
+    else:
+        ylim = _padded_limits(x)
+    if ylim is not None:
+        ax.set_ylim(ylim)
+    xmin, xmax = ax.get_ylim()
+    tmax = t[-1]
     if zeta < 1:
         ax.plot(t, A * np.exp(-zeta * omega * t), '--g',
                 linewidth=1)
         ax.plot(t, -A * np.exp(-zeta * omega * t), '--g',
                 linewidth=1, label=r'$A e^{- \zeta \omega t}$')
-        tmin, tmax, xmin, xmax = ax.axis()
         ax.text(.75 * tmax, .85 * (xmax - xmin) + xmin,
                 r'$\omega$ = %0.2f rad/sec' % (omega))
         ax.text(.75 * tmax, .80 * (xmax - xmin)
@@ -179,7 +245,6 @@ def time_plot(m=10, c=1, k=100, x0=1, v0=-1, max_time=100):
         ax.text(.75 * tmax, .75 * (xmax - xmin) + xmin,
                 r'$\omega_d$ = %0.2f rad/sec' % (omega_d))
     else:
-        tmin, tmax, xmin, xmax = ax.axis()
         ax.text(.75 * tmax, .85 * (xmax - xmin)
                 + xmin, r'$\zeta$ = %0.2f' % (zeta))
         ax.text(.75 * tmax, .80 * (xmax - xmin) + xmin,
@@ -223,30 +288,36 @@ def time_plot_i(max_time=(1.0, 100.0), x0=(-100, 100), v0=(-100, 100),
     '''
 
 
-def analytical(m=1, c=0.1, k=1, x0=1, v0=0, n=8, dt=0.05):
-    """Return x(t) of analytical solution."""
+def analytical(m=1, c=0.1, k=1, x0=1, v0=0, n=8, dt=0.05, verbose=False):
+    """Return x(t) of analytical solution.
+
+    The solution parameters are printed if `verbose` is True.
+    """
     w = np.sqrt(k / m)
     zeta = c / (2 * w * m)  # (1.30)
 
     wd = w * np.sqrt(1 - zeta**2)  # (1.37)
     t = np.linspace(0, n * dt, n + 1)
 
-    print('The natural frequency is ', w, 'rad/s.')
-    print('The damping ratio is ', zeta)
-    print('The damped natural frequency is ', wd)
+    if verbose:
+        print('The natural frequency is ', w, 'rad/s.')
+        print('The damping ratio is ', zeta)
+        print('The damped natural frequency is ', wd)
 
     if zeta < 1:
         A = np.sqrt(((v0 + zeta * w * x0)**2 + (x0 * wd)**2) / wd**2)  # (1.38)
         phi = np.arctan2(x0 * wd, v0 + zeta * w * x0)  # (1.38)
         x = A * np.exp(-zeta * w * t) * np.sin(wd * t + phi)  # (1.36)
-        print('A =', A)
-        print('phi =', phi)
+        if verbose:
+            print('A =', A)
+            print('phi =', phi)
 
     elif zeta == 1:
         a1 = x0  # (1.46)
         a2 = v0 + w * x0  # (1.46)
-        print('a1= ', a1)
-        print('a2= ', a2)
+        if verbose:
+            print('a1= ', a1)
+            print('a2= ', a2)
         x = (a1 + a2 * t) * np.exp(-w * t)  # (1.45)
 
     else:
@@ -254,8 +325,9 @@ def analytical(m=1, c=0.1, k=1, x0=1, v0=0, n=8, dt=0.05):
             (2 * w * np.sqrt(zeta**2 - 1))  # (1.42)
         a2 = (v0 + (zeta + np.sqrt(zeta**2 - 1)) * w * x0) / \
             (2 * w * np.sqrt(zeta**2 - 1))  # (1.43)
-        print('a1= ', a1)
-        print('a2= ', a2)
+        if verbose:
+            print('a1= ', a1)
+            print('a2= ', a2)
         x = (np.exp(-zeta * w * t)
              * (a1 * np.exp(-w * np.sqrt(zeta**2 - 1) * t)
              + a2 * np.exp(w * np.sqrt(zeta**2 - 1) * t)))  # (1.41)
@@ -298,22 +370,85 @@ def _euler(m=1, c=.1, k=1, x0=1, v0=0, n=8, dt=0.05):
            [ 0.95, -0.34],
            [ 0.93, -0.39]]))
     """
-    # creates the state space matrix
-    A = np.array([[0, 1],
-                  [-k / m, -c / m]])
     # creates the x array and set the first line according to the initial
     # conditions
     x = np.zeros((n + 1, 2))
     x[0] = x0, v0
 
-    for i in range(0, n):
-        x[i + 1] = x[i] + dt * A@x[i]
+    # the state space matrix is [[0, 1], [-k / m, -c / m]]
+    _euler_steps(x, -k / m, -c / m, dt)
 
     t = np.linspace(0, n * dt, n + 1)
 
     return t, x
 
 
+def _euler_steps(x, a21, a22, dt):
+    """Fill the rows of `x` after the first with Euler steps.
+
+    The state space matrix is [[0, 1], [a21, a22]]. Compiled with numba
+    when it is installed.
+    """
+    for i in range(x.shape[0] - 1):
+        x0 = x[i, 0]
+        x1 = x[i, 1]
+        x[i + 1, 0] = x0 + dt * x1
+        x[i + 1, 1] = x1 + dt * (a21 * x0 + a22 * x1)
+
+
+if njit is not None:
+    _euler_steps = njit(cache=True)(_euler_steps)
+
+
+def _euler_batch(m, c, k, x0=1, v0=0, n=8, dt=0.05):
+    """Euler method free responses of a batch of SDOF systems.
+
+    Same as `_euler` for arrays of masses, damping, stiffnesses and
+    initial conditions, e.g. for Monte Carlo sweeps. The parameters are
+    broadcast against each other.
+
+    Returns
+    -------
+    t: array
+        Time
+    x: array
+        Displacement and velocity, with shape (systems, n + 1, 2)
+
+    Examples
+    --------
+    >>> import vibration_toolbox as vtb
+    >>> t, x = vtb.sdof._euler_batch(m=1, c=[0.1, 0.2], k=[1, 2])
+    >>> x.shape
+    (2, 9, 2)
+    """
+    m, c, k, x0, v0 = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(p, dtype=float))
+          for p in (m, c, k, x0, v0)))
+    x = np.zeros((len(m), n + 1, 2))
+    x[:, 0, 0] = x0
+    x[:, 0, 1] = v0
+
+    _euler_batch_steps(x, -k / m, -c / m, dt)
+
+    t = np.linspace(0, n * dt, n + 1)
+
+    return t, x
+
+
+def _euler_batch_steps(x, a21, a22, dt):
+    """Run `_euler_steps` on each system of the batch `x`.
+
+    Compiled with numba when it is installed, the systems then run in
+    parallel.
+    """
+    for j in prange(x.shape[0]):
+        _euler_steps(x[j], a21[j], a22[j], dt)
+
+
+if njit is not None:
+    _euler_batch_steps = njit(parallel=True, cache=True)(_euler_batch_steps)
+
+
 def _rk4(m=1, c=.1, k=1, x0=1, v0=0, n=8, dt=0.05):
     """Runge-Kutta solution of underdamped system.
 
@@ -352,21 +487,44 @@ def _rk4(m=1, c=.1, k=1, x0=1, v0=0, n=8, dt=0.05):
     t = np.linspace(0, n * dt, n + 1)
     x = np.zeros((n + 1, 2))
     x[0, :] = x0, v0
-    A = np.array([[0, 1],
-                  [-k / m, -c / m]])
-
-    def f(x_): return A@x_
 
-    for i in range(n):
-        k1 = dt * f(x[i])
-        k2 = dt * f(x[i] + k1 / 2)
-        k3 = dt * f(x[i] + k2 / 2)
-        k4 = dt * f(x[i] + k3)
-        x[i + 1] = x[i] + (k1 + 2.0 * (k2 + k3) + k4) / 6.0
+    # the state space matrix is [[0, 1], [-k / m, -c / m]]
+    _rk4_steps(x, -k / m, -c / m, dt)
 
     return t, x
 
 
+def _rk4_steps(x, a21, a22, dt):
+    """Fill the rows of `x` after the first with Runge-Kutta steps.
+
+    The state space matrix is [[0, 1], [a21, a22]]. Compiled with numba
+    when it is installed.
+    """
+    for i in range(x.shape[0] - 1):
+        x0 = x[i, 0]
+        x1 = x[i, 1]
+        k1_0 = dt * x1
+        k1_1 = dt * (a21 * x0 + a22 * x1)
+        y0 = x0 + k1_0 / 2
+        y1 = x1 + k1_1 / 2
+        k2_0 = dt * y1
+        k2_1 = dt * (a21 * y0 + a22 * y1)
+        y0 = x0 + k2_0 / 2
+        y1 = x1 + k2_1 / 2
+        k3_0 = dt * y1
+        k3_1 = dt * (a21 * y0 + a22 * y1)
+        y0 = x0 + k3_0
+        y1 = x1 + k3_1
+        k4_0 = dt * y1
+        k4_1 = dt * (a21 * y0 + a22 * y1)
+        x[i + 1, 0] = x0 + (k1_0 + 2.0 * (k2_0 + k3_0) + k4_0) / 6.0
+        x[i + 1, 1] = x1 + (k1_1 + 2.0 * (k2_1 + k3_1) + k4_1) / 6.0
+
+
+if njit is not None:
+    _rk4_steps = njit(cache=True)(_rk4_steps)
+
+
 # def
 # euler_beam_frf(xin=0.22,xout=0.22,fmin=0.0,fmax=1000.0,beamparams=np.array((7.31e10,
 # 1/12*0.03*.015**3, 2747, .015*0.03, 0.4)),
@@ -388,23 +546,45 @@ def frfplot(f, H):
     vibrationtesting.frfplot : Plots FRF in a variety of formats
 
     """
-    plt.subplot(211)
-    plt.plot(f, 20 * np.log10(np.absolute(np.sum(H, axis=1))), '-')
-    plt.grid(True)
-    plt.xlabel('Frequency (Hz)')
-    plt.ylabel('FRF (dB)')
-    axlim = plt.axis()
-    plt.axis(axlim + np.array([0, 0, -0.1 * (axlim[3] - axlim[2]),
-                               0.1 * (axlim[3] - axlim[2])]))
-
-    plt.subplot(212)
-    plt.plot(f, np.unwrap(np.angle(np.sum(H, axis=1))) / np.pi * 180, '-')
-    plt.grid(True)
-    plt.xlabel('Frequency (Hz)')
-    plt.ylabel('Phase (deg)')
-    axlim = plt.axis()
-    plt.axis(axlim + np.array([0, 0, -0.1 * (axlim[3] - axlim[2]),
-                               0.1 * (axlim[3] - axlim[2])]))
+    H_sum = np.sum(H, axis=1)
+    # magnitude in dB, computed in place
+    mag = np.absolute(H_sum)
+    np.log10(mag, out=mag)
+    mag *= 20
+
+    phase = np.unwrap(np.angle(H_sum)) / np.pi * 180
+
+    fig, (ax1, ax2) = plt.subplots(2, 1)
+    ax1.plot(f, mag, '-')
+    ax1.grid(True)
+    ax1.set_xlabel('Frequency (Hz)')
+    ax1.set_ylabel('FRF (dB)')
+    ylim = _padded_limits(mag)
+    if ylim is not None:
+        ax1.set_ylim(ylim)
+
+    ax2.plot(f, phase, '-')
+    ax2.grid(True)
+    ax2.set_xlabel('Frequency (Hz)')
+    ax2.set_ylabel('Phase (deg)')
+    ylim = _padded_limits(phase)
+    if ylim is not None:
+        ax2.set_ylim(ylim)
+
+
+def _padded_limits(*ys):
+    """Limits around the finite values of all `ys`, with 10% padding.
+
+    Returns None when there are no finite values, e.g. the dB magnitude of
+    an FRF that is zero everywhere.
+    """
+    y = np.concatenate([np.ravel(yi) for yi in ys])
+    y = y[np.isfinite(y)]
+    if y.size == 0:
+        return None
+    ymin, ymax = y.min(), y.max()
+    pad = 0.1 * (ymax - ymin) if ymax > ymin else 1.0
+    return ymin - pad, ymax + pad
 
 
 def response(xdd, f, t, x0, v0):
@@ -453,7 +633,7 @@ def response(xdd, f, t, x0, v0):
 
 
 def _forced_analytical(m=10, k=100, x0=1, v0=0,
-                       wdr=0.5, F0=10, tf=100):
+                       wdr=0.5, F0=10, tf=100, dt=None):
     """Deprecated Return response of an undamped SDOFS to sinusiod.
 
     Parameters
@@ -468,6 +648,9 @@ def _forced_analytical(m=10, k=100, x0=1, v0=0,
         Force magnitude
     tf: float
         End time
+    dt: float, optional
+        Time step. By default 20 samples per period of the highest of the
+        natural and forcing frequencies, with at least 100 samples.
 
     Returns
     -------
@@ -478,10 +661,12 @@ def _forced_analytical(m=10, k=100, x0=1, v0=0,
     """
     # >>> _forced_analytical(m=10, k=100, x0=1, v0=0, wdr=0.5, F0=10, tf=100)
 
-    t = np.linspace(0, tf, tf / 0.000125)
-
     f0 = F0 / m
     w = np.sqrt(k / m)
+
+    if dt is None:
+        dt = min(2 * np.pi / (20 * max(w, wdr)), tf / 100)
+    t = np.linspace(0, tf, max(100, int(round(tf / dt)) + 1))
     x = (v0 / w * np.sin(w * t)
          + (x0 - f0 / (w**2 - wdr**2)) * np.cos(w * t)
          + f0 / (w**2 - wdr**2) * np.cos(wdr * t))   # (2.11)
@@ -1158,11 +1343,11 @@ def plot_sdof_resp(m=1.0, c=0.2, k=100.0):
                     * 10**np.floor(np.log10(max_freq)))
 
         omega = np.linspace(0, max_freq, num_points)
-        s = sp.sqrt(-1.0) * omega
+        s = 1j * omega
         freq_response = 1 / (m * s**2 + c * s + k)
 
-        roots = np.array([[-zeta * omega_n - omega_d * sp.sqrt(-1.0)],
-                          [-zeta * omega_n + omega_d * sp.sqrt(-1)]])
+        roots = np.array([[-zeta * omega_n - omega_d * 1j],
+                          [-zeta * omega_n + omega_d * 1j]])
 
     elif zeta > 1.0:
 
@@ -1213,7 +1398,7 @@ def plot_sdof_resp(m=1.0, c=0.2, k=100.0):
                     * 10**np.floor(np.log10(max_freq)))
 
         omega = np.linspace(0, max_freq, num_points)
-        s = sp.sqrt(-1.0) * omega
+        s = 1j * omega
         freq_response = 1 / (m * s**2 + c * s + k)
 
     elif np.abs(zeta) < 1e-5:
@@ -1249,11 +1434,11 @@ def plot_sdof_resp(m=1.0, c=0.2, k=100.0):
                     * 10**np.floor(np.log10(max_freq)))
 
         omega = np.linspace(0, max_freq, num_points)
-        s = sp.sqrt(-1.0) * omega
+        s = 1j * omega
         freq_response = 1 / (m * s**2 + c * s + k)
 
-        roots = np.array([[-zeta * omega_n - omega_d * sp.sqrt(-1.0)],
-                          [-zeta * omega_n + omega_d * sp.sqrt(-1)]])
+        roots = np.array([[-zeta * omega_n - omega_d * 1j],
+                          [-zeta * omega_n + omega_d * 1j]])
 
     fig = plt.figure(figsize=(18, 10), dpi=80,
                      facecolor='w', edgecolor='k')
@@ -91,3 +91,47 @@ def test_modes_sys_prop():
     wn, wd, zeta, X, Y = modes_sys_prop()
     assert_allclose(X, np.array([[-0.973249,  0.229753],
                                  [-0.229753, -0.973249]]), rtol=1e-05)
+
+
+def test_euler_beam_modes_selected_modes():
+    wn, _, U = vtb.euler_beam_modes(n=6, bctype=2)
+    wn_sel, _, U_sel = vtb.euler_beam_modes(n=np.array([3, 6]), bctype=2)
+    assert_allclose(wn_sel, wn[[2, 5]])
+    assert_allclose(U_sel, U[:, [2, 5]])
+
+
+def test_euler_beam_modes_cached_copy():
+    wn, _, U = vtb.euler_beam_modes(n=3, bctype=5)
+    U[:] = 0
+    wn[:] = 0
+    wn_new, _, U_new = vtb.euler_beam_modes(n=3, bctype=5)
+    assert np.all(wn_new > 0)
+    assert np.any(U_new != 0)
+
+
+def test_euler_beam_frf_npoints():
+    fout, H = vtb.euler_beam_frf(npoints=500)
+    assert fout.shape == (500,)
+    assert H.shape[0] == 500
+
+
+def test_uniform_bar_modes():
+    E, rho, L = 7.31e10, 2747.0, 0.4
+    c = np.sqrt(E / rho)
+    wn, x, U = vtb.uniform_bar_modes(n=4, bctype=3)
+    assert_allclose(x[-1], L)
+    assert_allclose(wn, np.arange(1, 5) * np.pi * c / L)
+    assert_allclose(np.einsum('ij,ij->j', U, U) * rho * L, np.ones(4))
+
+    wn, _, _ = vtb.uniform_bar_modes(n=4, bctype=1)
+    assert_allclose(wn, np.arange(4) * np.pi * c / L)
+
+    # a stiff end spring is close to a fixed end
+    wn, _, _ = vtb.uniform_bar_modes(n=4, bctype=4, kl_over_EA=1e6)
+    assert_allclose(wn, np.arange(1, 5) * np.pi * c / L, rtol=1e-5)
+
+    wn, _, _ = vtb.uniform_bar_modes(n=4, bctype=5, m_over_rhoAL=2.0)
+    lam = wn * L / c
+    assert_allclose(np.tan(lam), 1 / lam / 2.0)
+    n = np.arange(1, 5)
+    assert np.all((lam > (n - 1) * np.pi) & (lam < (n - 0.5) * np.pi))
@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 import vibration_toolbox as vtb
 from numpy.testing import assert_allclose
+from scipy.integrate import odeint
 
 
 def test_free_response():
@@ -13,6 +14,40 @@ def test_free_response():
     assert_allclose(vtb.free_response()[1][:5], response)
 
 
+def test_free_response_damping():
+    # underdamped, critically damped and overdamped, with positive and
+    # negative damping
+    for c in (20, 2 * np.sqrt(1000), 100, -20, -2 * np.sqrt(1000), -100):
+        t, x, v, *_ = vtb.free_response(c=c, x0=1, v0=-1, max_time=2)
+        z = odeint(lambda z, t: [z[1], -c / 10 * z[1] - 100 / 10 * z[0]],
+                   [1, -1], t, rtol=1e-10, atol=1e-10)
+        assert_allclose(np.hstack((x, v)), z, rtol=1e-6, atol=1e-6)
+
+
+def test_free_response_batch():
+    x0 = np.array([1, 0, -2])
+    v0 = np.array([-1, 3, 0.5])
+    t, x, v, *_, A = vtb.free_response(x0=x0, v0=v0)
+    assert x.shape == v.shape == (len(t), 3)
+    for i in range(3):
+        _, xi, vi, *_, Ai = vtb.free_response(x0=x0[i], v0=v0[i])
+        assert_allclose(x[:, i:i + 1], xi)
+        assert_allclose(v[:, i:i + 1], vi)
+        assert_allclose(A[i], Ai)
+
+
+def test_euler_batch():
+    m = np.array([1, 2, 0.5])
+    c = np.array([0.1, 0.3, 0.05])
+    k = np.array([1, 3, 2])
+    t, x = vtb.sdof._euler_batch(m, c, k, x0=1, v0=[0, 1, -1], n=50)
+    assert x.shape == (3, 51, 2)
+    for i, v0 in enumerate([0, 1, -1]):
+        ti, xi = vtb.sdof._euler(m[i], c[i], k[i], x0=1, v0=v0, n=50)
+        assert_allclose(t, ti)
+        assert_allclose(x[i], xi)
+
+
 def test_fourier_series():
     f = np.hstack((np.arange(-1, 1, .04), np.arange(1, -1, -.04)))
     f += 1
@@ -63,3 +98,10 @@ def test_rotating_unbalance():
                               0.03011213 - 1.81354593e-04j,
                               0.04017667 - 3.22853882e-04j]),
                     atol=1e-7)
+
+
+def test_frfplot_zero():
+    # the dB magnitude of a zero FRF is -inf everywhere
+    f = np.linspace(0, 10, 5)
+    with np.errstate(divide='ignore'):
+        vtb.frfplot(f, np.zeros((5, 2)))
@@ -91,3 +91,35 @@ def test_modes_sys_prop():
     wn, wd, zeta, X, _ = modes_sys_prop()
     assert_allclose(X, np.array([[-0.973249,  0.229753],
                                  [-0.229753, -0.973249]]), rtol=1e-05)
+
+
+def test_vibesystem_A():
+    K = np.array([[2000, -1000], [-1000, 2000]])
+    C = np.array([[2, -1], [-1, 2]])
+    # symmetric positive definite M, a general M and a general M with
+    # entries below the default allclose tolerance
+    for M in (np.array([[2, 0.5], [0.5, 1]]), np.array([[1, 0.2], [0, 1]]),
+              np.array([[2e-9, 1e-9], [0, 2e-9]])):
+        sys = vtb.VibeSystem(M, C, K)
+        A = np.vstack([np.hstack([np.zeros((2, 2)), np.eye(2)]),
+                       np.hstack([-np.linalg.solve(M, K),
+                                  -np.linalg.solve(M, C)])])
+        assert_allclose(sys.A(), A)
+
+    with pytest.raises(np.linalg.LinAlgError):
+        vtb.VibeSystem(np.array([[1, 1], [1, 1]]), C, K).wn
+
+
+def test_vibesystem_update():
+    M = np.eye(2)
+    C = np.array([[2, -1], [-1, 2]])
+    K = np.array([[2000, -1000], [-1000, 2000]])
+    sys = vtb.VibeSystem(M, C, K)
+    lti = sys.lti
+    sys.K = 4 * K
+    sys.C = 2 * C
+    new = vtb.VibeSystem(M, 2 * C, 4 * K)
+    assert_allclose(sys.wn, new.wn)
+    assert_allclose(sys.A(), new.A())
+    assert sys.lti is not lti
+    assert_allclose(sys.lti.A, new.A())
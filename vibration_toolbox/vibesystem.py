@@ -1,11 +1,22 @@
+from collections import namedtuple
+
 import numpy as np
 import scipy.linalg as la
 import scipy.signal as signal
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 __all__ = ['VibeSystem']
 
+# Largest number of states (2 n) for which freq_response uses the numba
+# kernel. Above it the BLAS products are faster.
+_FREQ_KERNEL_MAX_STATES = 20
+
 plt.style.use('seaborn-white')
 
 color_palette = ["#4C72B0", "#55A868", "#C44E52",
@@ -28,6 +39,48 @@ for code, color in zip('bgrmyck', colors):
     mpl.colors.colorConverter.cache[code] = rgb
 
 
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _freq_kernel(G, T, out):
+        """Fill out[w, j] with the sum over k of G[w, k] T[k, j].
+
+        The complex product G @ T in one pass, without the split real and
+        imaginary temporaries of the BLAS path.
+        """
+        for w in prange(out.shape[0]):
+            for j in range(out.shape[1]):
+                s = 0j
+                for k in range(G.shape[1]):
+                    s += G[w, k] * T[k, j]
+                out[w, j] = s
+
+
+class StateSpace(namedtuple('StateSpace', ['A', 'B', 'C', 'D'])):
+    """State space matrices (A, B, C, D) of a system."""
+    __slots__ = ()
+
+    @property
+    def inputs(self):
+        return self.B.shape[1]
+
+    @property
+    def outputs(self):
+        return self.C.shape[0]
+
+
+def _system_attribute(name):
+    """Read only attribute of VibeSystem set by its _calc_system method.
+
+    The system is only calculated when one of these attributes is read
+    after M, C or K changed.
+    """
+    def fget(self):
+        self._update_system()
+        return getattr(self, '_' + name)
+
+    return property(fget)
+
+
 class VibeSystem(object):
     r"""A multiple degrees of freedom system.
 
@@ -57,7 +110,9 @@ class VibeSystem(object):
         System's damped natural frequencies in rad/s.
     damping_ratio : array
         System's damping factor for each mode.
-    H : scipy.signal.lti
+    H : StateSpace
+        State space matrices (A, B, C, D) of the system.
+    lti : scipy.signal.lti
         Continuous-time linear time invariant system
 
     Examples
@@ -82,20 +137,26 @@ class VibeSystem(object):
     >>> sys.wd  # doctest: +SKIP
     array([31.52,  54.26])
     """
+    # Values for these attributes are calculated by self._calc_system
+    evalues = _system_attribute('evalues')
+    evectors = _system_attribute('evectors')
+    wn = _system_attribute('wn')
+    wd = _system_attribute('wd')
+    damping_ratio = _system_attribute('damping_ratio')
+    H = _system_attribute('H')
+
     def __init__(self, M, C, K, name=''):
         self._M = M
         self._C = C
         self._K = K
         self.name = name
-        # Values for evalues and evectors will be calculated by self._calc_system
-        self.evalues = None
-        self.evectors = None
-        self.wn = None
-        self.wd = None
-        self.lti = None
 
         self.n = len(M)
-        self._calc_system()
+        # State space matrix, the lower blocks are updated by _calc_system
+        self._A = np.zeros((2 * self.n, 2 * self.n))
+        self._A[:self.n, self.n:] = np.eye(self.n)
+        # The system is calculated on first use
+        self._changed = True
 
     @property
     def M(self):
@@ -104,8 +165,8 @@ class VibeSystem(object):
     @M.setter
     def M(self, value):
         self._M = value
-        # if the parameter is changed this will update the system
-        self._calc_system()
+        # if the parameter is changed the system will be updated on next use
+        self._changed = True
 
     @property
     def C(self):
@@ -114,8 +175,8 @@ class VibeSystem(object):
     @C.setter
     def C(self, value):
         self._C = value
-        # if the parameter is changed this will update the system
-        self._calc_system()
+        # if the parameter is changed the system will be updated on next use
+        self._changed = True
 
     @property
     def K(self):
@@ -124,8 +185,8 @@ class VibeSystem(object):
     @K.setter
     def K(self, value):
         self._K = value
-        # if the parameter is changed this will update the system
-        self._calc_system()
+        # if the parameter is changed the system will be updated on next use
+        self._changed = True
 
     def __repr__(self):
         M = np.array_str(self.M)
@@ -138,13 +199,52 @@ class VibeSystem(object):
                 'Damping Matrix: \n'
                 '{}'.format(M, K, C))
 
+    def _update_system(self):
+        """Calculate the system if M, C or K changed since last time."""
+        if self._changed:
+            self._calc_system()
+
     def _calc_system(self):
-        self.evalues, self.evectors = self._eigen()
-        self.wn = np.absolute(self.evalues)[:self.n]
-        self.wd = np.imag(self.evalues)[:self.n]
-        self.damping_ratio = (-np.real(self.evalues) /
-                              np.absolute(self.evalues))[:self.n]
-        self.lti = self._lti()
+        # M is factored once and reused for all the products with M^-1.
+        # Mass matrices are usually symmetric positive definite, so the
+        # Cholesky factorization is tried first. cho_factor only reads one
+        # triangle of M, so M has to be exactly symmetric.
+        self._M_cho = None
+        self._M_lu = None
+        if np.array_equal(self.M, np.transpose(self.M)):
+            try:
+                self._M_cho = la.cho_factor(self.M)
+            except la.LinAlgError:
+                pass
+        if self._M_cho is None:
+            self._M_lu = la.lu_factor(self.M)
+            # lu_factor only warns about an exactly singular M
+            if np.any(np.diag(self._M_lu[0]) == 0):
+                raise la.LinAlgError('singular matrix')
+        self._Minv_K = self._solve_M(self.K)
+        self._Minv_C = self._solve_M(self.C)
+        n = self.n
+        np.negative(self._Minv_K, out=self._A[n:, :n])
+        np.negative(self._Minv_C, out=self._A[n:, n:])
+
+        self._evalues, self._evectors = self._eigen()
+        self._wn = np.absolute(self._evalues)[:self.n]
+        self._wd = np.imag(self._evalues)[:self.n]
+        self._damping_ratio = (-np.real(self._evalues) /
+                               np.absolute(self._evalues))[:self.n]
+        self._H = self._state_space()
+        # psi^-1 B for freq_response, solved with the LU factors of the
+        # eigenvector matrix instead of its inverse
+        self._psi_inv_B = la.lu_solve(la.lu_factor(self._evectors),
+                                      self._H.B)
+        self._lti = None
+        self._changed = False
+
+    def _solve_M(self, X):
+        """Return M^-1 X using the factorization of M."""
+        if self._M_cho is not None:
+            return la.cho_solve(self._M_cho, X)
+        return la.lu_solve(self._M_lu, X)
 
     def A(self):
         """State space matrix
@@ -176,15 +276,8 @@ class VibeSystem(object):
                [-2000.,  1000.,    -2.,     1.],
                [ 1000., -2000.,     1.,    -2.]])
         """
-
-        Z = np.zeros((self.n, self.n))
-        I = np.eye(self.n)
-
-        A = np.vstack(
-            [np.hstack([Z, I]),
-             np.hstack([la.solve(-self.M, self.K),
-                        la.solve(-self.M, self.C)])])
-        return A
+        self._update_system()
+        return self._A.copy()
 
     @staticmethod
     def _index(eigenvalues):
@@ -199,10 +292,8 @@ class VibeSystem(object):
         b = np.absolute(evals_truncated)  # Second column
         ind = np.lexsort((b, a))  # Sort by imag, then by absolute
         # Positive eigenvalues first
-        positive = [i for i in ind[len(a) // 2:]]
-        negative = [i for i in ind[:len(a) // 2]]
-
-        idx = np.array([positive, negative]).flatten()
+        half = len(ind) // 2
+        idx = np.concatenate([ind[half:], ind[:half]])
 
         return idx
 
@@ -212,7 +303,8 @@ class VibeSystem(object):
         considers the imaginary part (wd) of the eigenvalues for sorting.
         To avoid sorting use sorted_=False
         """
-        evalues, evectors = la.eig(self.A())
+        # M, K and C were checked by the solves that built A
+        evalues, evectors = la.eig(self._A, check_finite=False)
         if sorted_ is False:
             return evalues, evectors
 
@@ -220,34 +312,45 @@ class VibeSystem(object):
 
         return evalues[idx], evectors[:, idx]
 
-    def _lti(self):
+    @property
+    def lti(self):
         r"""Continuous-time linear time invariant system.
 
-        This method is used to create a Continuous-time linear
-        time invariant system for the mdof system.
-        From this system we can obtain poles, impulse response,
-        generate a bode, etc.
+        The scipy.signal.lti of the system, built from the state space
+        matrices on first use. From this system we can obtain poles,
+        impulse response, generate a bode, etc.
+        """
+        self._update_system()
+        if self._lti is None:
+            self._lti = signal.lti(*self.H)
+        return self._lti
+
+    def _state_space(self):
+        r"""State space matrices of the system.
+
+        This method is used to create the state space matrices
+        (A, B, C, D) for the mdof system.
         """
         Z = np.zeros((self.n, self.n))
         I = np.eye(self.n)
 
         # x' = Ax + Bu
         B2 = I
-        A = self.A()
-        B = np.vstack([Z,
-                       la.solve(self.M, B2)])
+        # copy, as the buffer of A is updated in place when the system changes
+        A = self._A.copy()
+        B = np.zeros((2 * self.n, self.n))
+        B[self.n:] = self._solve_M(B2)
 
         # y = Cx + Du
         # Observation matrices
         Cd = I
         Cv = Z
-        Ca = Z
-
-        C = np.hstack((Cd - Ca @ la.solve(self.M, self.K),
-                       Cv - Ca @ la.solve(self.M, self.C)))
-        D = Ca @ la.solve(self.M, B2)
+        # There is no acceleration output (Ca = 0), so the
+        # Ca @ M^-1 K, Ca @ M^-1 C and Ca @ M^-1 B2 terms vanish.
+        C = np.hstack((Cd, Cv))
+        D = Z
 
-        return signal.lti(A, B, C, D)
+        return StateSpace(A, B, C, D)
 
     def time_response(self, F, t, ic=None):
         r"""Time response for a mdof system.
@@ -351,20 +454,19 @@ class VibeSystem(object):
         >>> phase[1, 1, :4]
         array([...0.  , -0.  , -0.01, -0.01])
         """
-        rows = self.lti.inputs   # inputs (mag and phase)
-        cols = self.lti.outputs  # outputs
+        rows = self.H.inputs   # inputs (mag and phase)
+        cols = self.H.outputs  # outputs
 
-        B = self.lti.B
-        C = self.lti.C
-        D = self.lti.D
+        C = self.H.C
+        D = self.H.D
 
         evals = self.evalues
         psi = self.evectors
-        psi_inv = la.inv(psi)  # TODO change to get psi_inv from la.eig
+        psi_inv_B = self._psi_inv_B
 
         # if omega is not given, define a range
         if omega is None:
-            omega = np.linspace(0, max(evals.imag) * 1.5, 1000)
+            omega = np.linspace(0.0, evals.imag.max() * 1.5, 1000)
 
         # if modes are selected:
         if modes is not None:
@@ -377,23 +479,117 @@ class VibeSystem(object):
 
             evals = evals[np.ix_(idx)]
             psi = psi[np.ix_(range(2 * n), idx)]
-            psi_inv = psi_inv[np.ix_(idx, range(2 * n))]
+            psi_inv_B = psi_inv_B[idx]
 
         magdb = np.empty((cols, rows, len(omega)))
         phase = np.empty((cols, rows, len(omega)))
 
-        for wi, w in enumerate(omega):
-            diag = np.diag([1 / (1j * w - lam) for lam in evals])
-            if F is None:
-                H = C @ psi @ diag @ psi_inv @ B + D
+        # H(w) = C psi diag(1 / (jw - lambda)) psi^-1 B + D for all the
+        # frequencies at once, with shape [frequency, output, input].
+        # With lambda = a + jb, 1 / (jw - lambda) = (-a - j(w - b)) / den
+        # where den = (w - b)**2 + a**2, so G is formed with real division.
+        dw = np.asarray(omega, dtype=float)[:, None] - evals.imag
+        den = dw * dw + evals.real * evals.real
+        G = np.empty(den.shape, dtype=complex)
+        np.divide(-evals.real, den, out=G.real)
+        np.divide(-dw, den, out=G.imag)
+        # T[k, (o, i)] = (C psi)[o, k] (psi^-1 B)[k, i] does not depend on
+        # the frequency, so H is the product G @ T.
+        T = np.einsum('ok,ki->koi', C @ psi, psi_inv_B)
+        T = T.reshape(len(evals), cols * rows)
+        H = np.empty((len(omega), cols * rows), dtype=complex)
+        if njit is not None and len(evals) <= _FREQ_KERNEL_MAX_STATES:
+            _freq_kernel(G, T, H)
+        else:
+            # four real products on the split real and imaginary parts
+            Gr, Gi = G.real, G.imag
+            Tr, Ti = T.real, T.imag
+            np.subtract(Gr @ Tr, Gi @ Ti, out=H.real)
+            np.add(Gr @ Ti, Gi @ Tr, out=H.imag)
+        H = H.reshape(len(omega), cols, rows) + D
+        if F is not None:
+            F = np.asarray(F)
+            if F.ndim == 2:
+                H = np.einsum('woi,wi->wo', H, F)[:, None, :]
             else:
-                H = (C @ psi @ diag @ psi_inv @ B + D) @ F[wi]
+                H = H @ F
+
+        # magnitude and phase written straight into the output arrays
+        absH = abs(H)
+        np.log10(absH, out=absH)
+        np.multiply(absH.transpose(1, 2, 0), 20.0, out=magdb)
+        np.rad2deg(np.angle(H).transpose(1, 2, 0), out=phase)
+
+        return omega, magdb, phase
+
+    @staticmethod
+    def batch_freq_response(Ms, Cs, Ks, omega):
+        r"""Frequency response for several mdof systems at once.
 
-            magh = 20.0 * np.log10(abs(H))
-            angh = np.rad2deg((np.angle(H)))
+        This method returns the frequency response of a set of systems
+        with the same number of degrees of freedom, e.g. for a sweep of
+        design parameters, without creating a VibeSystem for each one.
 
-            magdb[:, :, wi] = magh
-            phase[:, :, wi] = angh
+        Parameters
+        ----------
+        Ms : array
+            Mass matrices, with shape (systems, n, n).
+        Cs : array
+            Damping matrices, with shape (systems, n, n).
+        Ks : array
+            Stiffness matrices, with shape (systems, n, n).
+        omega : array
+            Array with the desired range of frequencies.
+
+        Returns
+        ----------
+        omega : array
+            Array with the frequencies
+        magdb : array
+            Magnitude (dB) of the frequency response for each system and
+            pair input/output.
+            The order of the array is: [system, output, input, magnitude]
+        phase : array
+            Phase of the frequency response for each system and pair
+            input/output.
+            The order of the array is: [system, output, input, phase]
+
+        Examples
+        --------
+        >>> M = np.array([[1, 0],
+        ...               [0, 1]])
+        >>> C = np.array([[2, -1],
+        ...               [-1, 2]])
+        >>> K = np.array([[2000, -1000],
+        ...               [-1000, 2000]])
+        >>> omega = np.linspace(0, 80, 500)
+        >>> Ks = np.array([K, 2 * K, 3 * K])
+        >>> _, magdb, phase = VibeSystem.batch_freq_response(
+        ...     [M, M, M], [C, C, C], Ks, omega)
+        >>> magdb.shape
+        (3, 2, 2, 500)
+        >>> _, magdb1, _ = VibeSystem(M, C, 2 * K).freq_response(omega=omega)
+        >>> np.allclose(magdb[1], magdb1)
+        True
+        """
+        Ms = np.asarray(Ms)
+        Cs = np.asarray(Cs)
+        Ks = np.asarray(Ks)
+        omega = np.asarray(omega, dtype=float)
+
+        # With the displacements as outputs and the forces as inputs,
+        # C (jwI - A)^-1 B + D is the inverse of the dynamic stiffness
+        # K - w**2 M + jw C. All systems and frequencies are solved in a
+        # single batched call, with shape [system, frequency, n, n].
+        w = omega[:, None, None]
+        Z = (Ks[..., None, :, :] - w * w * Ms[..., None, :, :] +
+             1j * w * Cs[..., None, :, :])
+        H = np.linalg.inv(Z)
+
+        # [system, output, input, frequency]
+        H = np.moveaxis(H, -3, -1)
+        magdb = 20.0 * np.log10(abs(H))
+        phase = np.rad2deg(np.angle(H))
 
         return omega, magdb, phase
 
@@ -458,6 +654,18 @@ class VibeSystem(object):
         #  TODO add option to select plot units
         omega, magdb, phase = self.freq_response(modes=modes)
 
+        return self._plot_freq_response_from_data(omega, magdb, phase,
+                                                  out, inp, ax0, ax1,
+                                                  **kwargs)
+
+    @staticmethod
+    def _plot_freq_response_from_data(omega, magdb, phase, out, inp,
+                                      ax0, ax1, **kwargs):
+        """Plot a frequency response already calculated by freq_response.
+
+        Plots the magnitude and phase for output `out` and input `inp`
+        on the axes ax0 and ax1 (see plot_freq_response).
+        """
         ax0.plot(omega, magdb[out, inp, :], **kwargs)
         ax1.plot(omega, phase[out, inp, :], **kwargs)
         for ax in [ax0, ax1]:
@@ -529,19 +737,20 @@ class VibeSystem(object):
                                    figsize=(4*len(outs), 3*len(inps)))
             fig.subplots_adjust(hspace=0.001, wspace=0.25)
 
+        # the response is calculated once for all the plotted pairs
+        response = self.freq_response(modes=modes)
+
         if len(outs) > 1:
             for i, out in enumerate(outs):
                 for j, inp in enumerate(inps):
-                    self.plot_freq_response(out, inp,
-                                            modes=modes,
-                                            ax0=ax[2*i, j],
-                                            ax1=ax[2*i + 1, j])
+                    self._plot_freq_response_from_data(*response, out, inp,
+                                                       ax0=ax[2*i, j],
+                                                       ax1=ax[2*i + 1, j])
         else:
             for i, inp in enumerate(inps):
-                self.plot_freq_response(outs[0], inp,
-                                        modes=modes,
-                                        ax0=ax[2*i],
-                                        ax1=ax[2*i + 1])
+                self._plot_freq_response_from_data(*response, outs[0], inp,
+                                                   ax0=ax[2*i],
+                                                   ax1=ax[2*i + 1])
 
         return ax
 
@@ -596,7 +805,7 @@ class VibeSystem(object):
         array([<matplotlib.axes...
         """
         if ax is None:
-            fig, axs = plt.subplots(self.lti.outputs, 1, sharex=True)
+            fig, axs = plt.subplots(self.H.outputs, 1, sharex=True)
 
             fig.suptitle('Time response ' + self.name, fontsize=12)
             plt.subplots_adjust(hspace=0.01)